@@ -2,11 +2,22 @@
 Interfaccia web Streamlit per il convertitore XDSL to PyAgrum.
 """
 
+import io
 import streamlit as st
-import tempfile
-import os
 from xdsl_converter import XDSLConverter
 
+@st.cache_data(show_spinner=False)
+def _convert(xdsl_bytes: bytes) -> str:
+    """
+    Converte il contenuto di un file XDSL in codice PyAgrum.
+    
+    Il risultato viene memorizzato da Streamlit in base al contenuto del file,
+    così i rerun successivi non ripetono la conversione.
+    """
+    converter = XDSLConverter()
+    converter.parse_xdsl(io.BytesIO(xdsl_bytes))
+    return converter.generate_pyagrum_code()
+
 def main():
     """Funzione principale dell'applicazione Streamlit."""
     
@@ -21,13 +32,7 @@ def main():
     
     if uploaded_file is not None:
         try:
-            with tempfile.NamedTemporaryFile(delete=False, suffix='.xdsl') as tmp_file:
-                tmp_file.write(uploaded_file.getvalue())
-                tmp_path = tmp_file.name
-            
-            converter = XDSLConverter()
-            converter.parse_xdsl(tmp_path)
-            pyagrum_code = converter.generate_pyagrum_code()
+            pyagrum_code = _convert(uploaded_file.getvalue())
             
             st.subheader("Codice PyAgrum Generato")
             st.code(pyagrum_code, language='python')
@@ -42,9 +47,6 @@ def main():
                 
         except Exception as e:
             st.error(f"Errore durante la conversione: {str(e)}")
-            
-        finally:
-            os.unlink(tmp_path)
     else:
         st.info("Carica un file XDSL per vedere il codice PyAgrum equivalente.")
 
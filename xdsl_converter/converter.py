@@ -4,16 +4,84 @@ XDSL to PyAgrum Converter
 Modulo principale per la conversione di file XDSL in codice PyAgrum.
 """
 
-import xml.etree.ElementTree as ET
+import io
+import re
+try:
+    from lxml import etree as ET
+    from lxml.etree import _Element
+    # Prima di lxml 5 le entità esterne vengono risolte di default: i file
+    # caricati dall'interfaccia web non sono affidabili
+    _ITERPARSE_OPTIONS = {'resolve_entities': False, 'no_network': True}
+except ImportError:
+    import xml.etree.ElementTree as ET
+    from xml.etree.ElementTree import Element as _Element
+    _ITERPARSE_OPTIONS = {}
 from abc import ABC, abstractmethod
-from typing import Dict, List, Optional, Union
-import pyAgrum as gum
+from typing import IO, TYPE_CHECKING, Dict, Iterator, List, NamedTuple, Optional, Union
+import numpy as np
+
+if TYPE_CHECKING:
+    import pyAgrum as gum
+
+_NODE_TAGS = ('cpt', 'decision', 'utility', 'mau')
+
+# Codici del tipo di nodo, usati come maschere dal generatore
+_CHANCE, _DECISION, _UTILITY, _UNKNOWN = 0, 1, 2, -1
+
+_CHANCE_TMPL = (
+    "# Creazione del nodo {n}\n"
+    "{n} = diag.addChanceNode(gum.LabelizedVariable('{n}', '{n}', {s}))\n"
+    "\n"
+)
+_DECISION_TMPL = (
+    "# Creazione del nodo decisione {n}\n"
+    "{n} = diag.addDecisionNode(gum.LabelizedVariable('{n}', '{n}', {s}))\n"
+    "\n"
+)
+_UTILITY_TMPL = (
+    "# Creazione del nodo utilità {n}\n"
+    "{n} = diag.addUtilityNode(gum.LabelizedVariable('{n}', '{n}', 1))\n"
+    "\n"
+)
+_CPT_TMPL = "diag.cpt({n}).fillWith(np.asarray({v}, dtype=np.float64))\n"
+_UTILITY_FILL_TMPL = "diag.utility({n}).fillWith(np.asarray({v}, dtype=np.float64))\n"
+
+# Separatori dei valori nei nodi XDSL: spazi e, in alcuni export GeNIe, virgole
+_SEPARATORS = ' \t\n\r\f\v,'
+_SPLIT_RE = re.compile(r'[\s,]+')
+
+def _split_tokens(text: Optional[str]) -> List[str]:
+    """Divide il testo di un elemento XDSL nei suoi token."""
+    text = text.strip(_SEPARATORS) if text else ''
+    return _SPLIT_RE.split(text) if text else []
+
+def _parse_floats(text: Optional[str]) -> np.ndarray:
+    """Converte il testo di un elemento XDSL in un array di float."""
+    tokens = _split_tokens(text)
+    return np.fromiter(map(float, tokens), dtype=np.float64, count=len(tokens))
+
+class _NodeRecord(NamedTuple):
+    """Dati di un nodo XDSL estratti durante il parsing in streaming."""
+    tag: str
+    node_id: Optional[str]
+    states: List[str]
+    parents: Optional[str]
+    probabilities: Optional[str]
+    utilities: Optional[str]
+    weights: Optional[str]
+    element: Optional[_Element]
 
 class NodeFactory:
     """Factory per la creazione di nodi nel diagramma di influenza."""
     
+    _DISPATCH = {
+        'cpt': 'addChanceNode',
+        'decision': 'addDecisionNode',
+        'utility': 'addUtilityNode',
+    }
+    
     @staticmethod
-    def create_node(network: gum.InfluenceDiagram, node_type: str, node_id: str, 
+    def create_node(network: 'gum.InfluenceDiagram', node_type: str, node_id: str, 
                    states: List[str]) -> int:
         """
         Crea un nuovo nodo nel diagramma.
@@ -27,32 +95,30 @@ class NodeFactory:
         Returns:
             int: ID del nodo creato
         """
+        method_name = NodeFactory._DISPATCH.get(node_type)
+        if method_name is None:
+            raise ValueError(f"Tipo di nodo non supportato: {node_type}")
+        
+        import pyAgrum as gum
+        
         var = gum.LabelizedVariable(node_id, node_id, 
                                   states if node_type != 'utility' else 1)
-        
-        if node_type == 'cpt':
-            return network.addChanceNode(var)
-        elif node_type == 'decision':
-            return network.addDecisionNode(var)
-        elif node_type == 'utility':
-            return network.addUtilityNode(var)
-        else:
-            raise ValueError(f"Tipo di nodo non supportato: {node_type}")
+        return getattr(network, method_name)(var)
 
 class CodeGenerator(ABC):
     """Interfaccia base per i generatori di codice."""
     
     @abstractmethod
-    def generate(self, network: gum.InfluenceDiagram, nodes: Dict[str, int],
-                utilities: Dict[str, ET.Element]) -> str:
+    def generate(self, network: 'gum.InfluenceDiagram', nodes: Dict[str, int],
+                utilities: Dict[str, _Element]) -> str:
         """Genera il codice per il network."""
         pass
 
 class PyAgrumCodeGenerator(CodeGenerator):
     """Generatore di codice PyAgrum."""
     
-    def generate(self, network: gum.InfluenceDiagram, nodes: Dict[str, int],
-                utilities: Dict[str, ET.Element]) -> str:
+    def generate(self, network: 'gum.InfluenceDiagram', nodes: Dict[str, int],
+                utilities: Dict[str, _Element]) -> str:
         """
         Genera il codice PyAgrum per il network.
         
@@ -64,91 +130,115 @@ class PyAgrumCodeGenerator(CodeGenerator):
         Returns:
             str: Codice PyAgrum generato
         """
-        code = [
-            "import pyAgrum as gum",
-            "",
-            "# Creazione del diagramma di influenza",
-            "diag = gum.InfluenceDiagram()",
-            ""
-        ]
+        kinds = np.fromiter((self._classify(network, h) for h in nodes.values()),
+                            dtype=np.int8, count=len(nodes))
+        return self._generate(network, nodes, utilities, kinds)
+    
+    def _generate(self, network: 'gum.InfluenceDiagram', nodes: Dict[str, int],
+                  utilities: Dict[str, _Element], kinds: np.ndarray) -> str:
+        """
+        Genera il codice PyAgrum a partire dai codici del tipo dei nodi.
         
-        # Genera codice per nodi chance
-        self._generate_chance_nodes(network, nodes, code)
+        Args:
+            network: Il diagramma di influenza
+            nodes: Dizionario dei nodi
+            utilities: Dizionario dei nodi utilità
+            kinds: Codici del tipo di ciascun nodo, nell'ordine di `nodes`
+            
+        Returns:
+            str: Codice PyAgrum generato
+        """
+        node_ids = list(nodes)
+        handles = list(nodes.values())
+        variables = [network.variable(h) for h in handles]
+        names = {h: var.name() for h, var in zip(handles, variables)}
         
-        # Genera codice per nodi decisione
-        self._generate_decision_nodes(network, nodes, code)
+        buf = io.StringIO()
+        buf.write(
+            "import numpy as np\n"
+            "import pyAgrum as gum\n"
+            "\n"
+            "# Creazione del diagramma di influenza\n"
+            "diag = gum.InfluenceDiagram()\n"
+            "\n"
+        )
         
-        # Genera codice per archi
-        self._generate_arcs(network, code)
+        # Genera codice per le dichiarazioni dei nodi
+        self._generate_declarations(node_ids, variables, kinds, buf)
         
-        # Genera codice per CPT
-        self._generate_cpts(network, nodes, code)
+        # Genera codice per archi
+        self._generate_arcs(network, node_ids, handles, kinds, names, buf)
         
-        # Genera codice per nodi utilità
-        self._generate_utility_nodes(network, nodes, code)
+        # Genera codice per CPT e utilità
+        self._generate_tables(network, node_ids, handles, kinds, buf)
         
-        return "\n".join(code)
+        return buf.getvalue()
     
-    def _generate_chance_nodes(self, network: gum.InfluenceDiagram, 
-                             nodes: Dict[str, int], code: List[str]) -> None:
-        """Genera il codice per i nodi chance."""
-        for node_id, node in nodes.items():
-            if network.isChanceNode(node):
-                var = network.variable(node)
-                states = [f'"{s}"' for s in var.labels()]
-                code.extend([
-                    f"# Creazione del nodo {node_id}",
-                    f"{node_id} = diag.addChanceNode(gum.LabelizedVariable('{node_id}', "
-                    f"'{node_id}', {states}))",
-                    ""
-                ])
+    @staticmethod
+    def _classify(network: 'gum.InfluenceDiagram', node: int) -> int:
+        """Restituisce il codice del tipo di nodo."""
+        if network.isChanceNode(node):
+            return _CHANCE
+        if network.isDecisionNode(node):
+            return _DECISION
+        if network.isUtilityNode(node):
+            return _UTILITY
+        return _UNKNOWN
     
-    def _generate_decision_nodes(self, network: gum.InfluenceDiagram,
-                               nodes: Dict[str, int], code: List[str]) -> None:
-        """Genera il codice per i nodi decisione."""
-        for node_id, node in nodes.items():
-            if network.isDecisionNode(node):
-                var = network.variable(node)
-                states = [f'"{s}"' for s in var.labels()]
-                code.extend([
-                    f"# Creazione del nodo decisione {node_id}",
-                    f"{node_id} = diag.addDecisionNode(gum.LabelizedVariable('{node_id}', "
-                    f"'{node_id}', {states}))",
-                    ""
-                ])
+    @staticmethod
+    def _states_literal(var: 'gum.DiscreteVariable') -> str:
+        """Restituisce la lista degli stati della variabile come letterale Python."""
+        return repr(list(var.labels()))
     
-    def _generate_arcs(self, network: gum.InfluenceDiagram, code: List[str]) -> None:
-        """Genera il codice per gli archi."""
-        code.append("# Aggiunta degli archi")
-        for arc in network.arcs():
-            parent = network.variable(arc[0]).name()
-            child = network.variable(arc[1]).name()
-            code.append(f"diag.addArc({parent}, {child})")
-        code.append("")
+    def _generate_declarations(self, node_ids: List[str],
+                               variables: List['gum.DiscreteVariable'],
+                               kinds: np.ndarray, buf: io.StringIO) -> None:
+        """Genera il codice per la creazione di tutti i nodi."""
+        for i in np.flatnonzero(kinds == _CHANCE):
+            states = self._states_literal(variables[i])
+            buf.write(_CHANCE_TMPL.format(n=node_ids[i], s=states))
+        for i in np.flatnonzero(kinds == _DECISION):
+            states = self._states_literal(variables[i])
+            buf.write(_DECISION_TMPL.format(n=node_ids[i], s=states))
+        for i in np.flatnonzero(kinds == _UTILITY):
+            buf.write(_UTILITY_TMPL.format(n=node_ids[i]))
     
-    def _generate_cpts(self, network: gum.InfluenceDiagram,
-                      nodes: Dict[str, int], code: List[str]) -> None:
-        """Genera il codice per le CPT."""
-        code.append("# Definizione delle probabilità condizionate")
-        for node_id, node in nodes.items():
-            if network.isChanceNode(node):
-                probs = network.cpt(node).tolist()
-                if probs:
-                    code.append(f"diag.cpt({node_id}).fillWith({probs})")
-        code.append("")
+    def _generate_arcs(self, network: 'gum.InfluenceDiagram', node_ids: List[str],
+                      handles: List[int], kinds: np.ndarray,
+                      names: Dict[int, str], buf: io.StringIO) -> None:
+        """
+        Genera il codice per gli archi.
+        
+        Gli archi entranti in nodi chance e utilità vengono emessi nell'ordine
+        delle variabili della loro tabella: pyAgrum ordina così le variabili
+        della tabella nel diagramma generato, e i valori piatti emessi da
+        _generate_tables finiscono nelle celle corrette.
+        """
+        buf.write("# Aggiunta degli archi\n")
+        for node_id, handle, kind in zip(node_ids, handles, kinds.tolist()):
+            if kind == _CHANCE:
+                parents = network.cpt(handle).names[1:]
+            elif kind == _UTILITY:
+                parents = network.utility(handle).names[1:]
+            else:
+                parents = [names[parent] for parent in network.parents(handle)]
+            for parent in parents:
+                buf.write(f"diag.addArc({parent}, {node_id})\n")
+        buf.write("\n")
     
-    def _generate_utility_nodes(self, network: gum.InfluenceDiagram,
-                              nodes: Dict[str, int], code: List[str]) -> None:
-        """Genera il codice per i nodi utilità."""
-        for node_id, node in nodes.items():
-            if network.isUtilityNode(node):
-                code.extend([
-                    f"# Creazione del nodo utilità {node_id}",
-                    f"{node_id} = diag.addUtilityNode(gum.LabelizedVariable('{node_id}', "
-                    f"'{node_id}', 1))",
-                    f"diag.utility({node_id}).fillWith({network.utility(node).tolist()})",
-                    ""
-                ])
+    def _generate_tables(self, network: 'gum.InfluenceDiagram', node_ids: List[str],
+                        handles: List[int], kinds: np.ndarray,
+                        buf: io.StringIO) -> None:
+        """Genera il codice per le CPT e le tabelle di utilità."""
+        buf.write("# Definizione delle probabilità condizionate e delle utilità\n")
+        for i in np.flatnonzero(kinds == _CHANCE):
+            probs = np.asarray(network.cpt(handles[i]).toarray(), dtype=np.float64).ravel()
+            if probs.size:
+                buf.write(_CPT_TMPL.format(n=node_ids[i], v=probs.tolist()))
+        for i in np.flatnonzero(kinds == _UTILITY):
+            utils = np.asarray(network.utility(handles[i]).toarray(), dtype=np.float64).ravel()
+            buf.write(_UTILITY_FILL_TMPL.format(n=node_ids[i], v=utils.tolist()))
+        buf.write("\n")
 
 class XDSLConverter:
     """Classe principale per la conversione di file XDSL in PyAgrum."""
@@ -160,18 +250,23 @@ class XDSLConverter:
         Args:
             code_generator: Generatore di codice da utilizzare
         """
+        import pyAgrum as gum
+        self._gum = gum
         self.network = None
         self.nodes: Dict[str, int] = {}
-        self.utilities: Dict[str, ET.Element] = {}
+        self.utilities: Dict[str, _Element] = {}
         self.weights: Dict[str, float] = {}
         self.code_generator = code_generator or PyAgrumCodeGenerator()
     
-    def parse_xdsl(self, file_path: str) -> gum.InfluenceDiagram:
+    def parse_xdsl(self, file_path: Union[str, IO[bytes]]) -> 'gum.InfluenceDiagram':
         """
         Parsa il file XDSL e crea il diagramma di influenza.
         
+        Lo stato del convertitore viene aggiornato solo se il parsing va a buon
+        fine: in caso di errore resta quello del file precedente.
+        
         Args:
-            file_path: Percorso del file XDSL
+            file_path: Percorso del file XDSL o file binario già aperto
             
         Returns:
             gum.InfluenceDiagram: Il diagramma di influenza creato
@@ -179,114 +274,175 @@ class XDSLConverter:
         Raises:
             ValueError: Se la struttura del file XDSL non è valida
         """
-        tree = ET.parse(file_path)
-        root = tree.getroot()
+        network = self._gum.InfluenceDiagram()
+        nodes: Dict[str, int] = {}
+        utilities: Dict[str, _Element] = {}
+        weights: Dict[str, float] = {}
+        deferred: List[_NodeRecord] = []
         
-        smile_nodes = root.find('.//nodes')
-        if smile_nodes is None:
-            raise ValueError("Struttura XDSL non valida: elemento 'nodes' non trovato")
-        
-        self.network = gum.InfluenceDiagram()
-        
-        # Prima passata: crea tutti i nodi
-        for node in smile_nodes:
-            self._create_node(node)
+        # Unica passata sul file: crea i nodi e accoda archi e probabilità
+        for record in self._iter_node_records(file_path):
+            node_id = record.node_id
+            if node_id is None:
+                continue
+            if record.tag == 'mau':
+                mau_weights = self._process_mau_node(record)
+                if mau_weights is not None:
+                    weights = mau_weights
+                continue
+            
+            nodes[node_id] = NodeFactory.create_node(
+                network, record.tag, node_id, record.states
+            )
+            if record.tag == 'utility':
+                utilities[node_id] = record.element
+            deferred.append(record)
             
-        # Seconda passata: aggiungi archi e probabilità
-        for node in smile_nodes:
-            self._add_arcs_and_probabilities(node)
+        # Archi e probabilità, ora che tutti i nodi esistono
+        for record in deferred:
+            self._add_arcs(network, nodes, record)
+            self._add_probabilities(network, nodes, weights, record)
+        
+        self.network = network
+        self.nodes = nodes
+        self.utilities = utilities
+        self.weights = weights
             
         return self.network
     
-    def _create_node(self, node: ET.Element) -> None:
+    def _iter_node_records(self, file_path: Union[str, IO[bytes]]) -> Iterator[_NodeRecord]:
         """
-        Crea un nodo nel diagramma.
+        Legge in streaming i nodi figli dell'elemento 'nodes'.
+        
+        Ogni nodo viene ridotto a un record e il suo sottoalbero XML viene
+        liberato subito dopo, così in memoria resta un solo nodo alla volta.
         
         Args:
-            node: Elemento XML rappresentante il nodo
+            file_path: Percorso del file XDSL o file binario già aperto
+            
+        Yields:
+            _NodeRecord: I record dei nodi nell'ordine del file
+            
+        Raises:
+            ValueError: Se l'elemento 'nodes' non è presente
         """
-        node_id = node.get('id')
-        if node_id is None:
-            return
+        smile_nodes = None
+        
+        for event, elem in ET.iterparse(file_path, events=('start', 'end'),
+                                       **_ITERPARSE_OPTIONS):
+            if event == 'start':
+                if smile_nodes is None and elem.tag == 'nodes':
+                    smile_nodes = elem
+                continue
+            if smile_nodes is None:
+                continue
+            if elem is smile_nodes:
+                break
+            if elem not in smile_nodes:
+                continue
             
-        states = [state.get('id') for state in node.findall('state')]
+            if elem.tag in _NODE_TAGS:
+                yield self._make_record(elem)
+            smile_nodes.remove(elem)
+            if elem.tag != 'utility':
+                elem.clear()
         
-        if node.tag in ['cpt', 'decision', 'utility']:
-            self.nodes[node_id] = NodeFactory.create_node(
-                self.network, node.tag, node_id, states
-            )
-            if node.tag == 'utility':
-                self.utilities[node_id] = node
-        elif node.tag == 'mau':
-            self._process_mau_node(node)
+        if smile_nodes is None:
+            raise ValueError("Struttura XDSL non valida: elemento 'nodes' non trovato")
     
-    def _process_mau_node(self, node: ET.Element) -> None:
+    @staticmethod
+    def _make_record(node: _Element) -> _NodeRecord:
         """
-        Processa un nodo MAU (Multi-Attribute Utility).
+        Estrae da un elemento XML i dati necessari alla conversione.
         
         Args:
-            node: Elemento XML rappresentante il nodo MAU
+            node: Elemento XML rappresentante il nodo
+            
+        Returns:
+            _NodeRecord: Il record del nodo
         """
-        parents_elem = node.find('parents')
-        weights_elem = node.find('weights')
-        if parents_elem is not None and weights_elem is not None:
-            parents = parents_elem.text.split() if parents_elem.text else []
-            weights = weights_elem.text.split() if weights_elem.text else []
-            self.weights = {
-                parent: float(weight) 
-                for parent, weight in zip(parents, weights)
-            }
+        states: List[str] = []
+        children: Dict[str, _Element] = {}
+        for child in node:
+            if child.tag == 'state':
+                states.append(child.get('id'))
+            else:
+                children.setdefault(child.tag, child)
+        
+        def text(tag: str) -> Optional[str]:
+            child = children.get(tag)
+            return child.text if child is not None else None
+        
+        return _NodeRecord(
+            tag=node.tag,
+            node_id=node.get('id'),
+            states=states,
+            parents=text('parents'),
+            probabilities=text('probabilities'),
+            utilities=text('utilities'),
+            weights=text('weights'),
+            element=node if node.tag == 'utility' else None,
+        )
     
-    def _add_arcs_and_probabilities(self, node: ET.Element) -> None:
+    @staticmethod
+    def _process_mau_node(record: _NodeRecord) -> Optional[Dict[str, float]]:
         """
-        Aggiunge archi e probabilità al nodo.
+        Processa un nodo MAU (Multi-Attribute Utility).
         
         Args:
-            node: Elemento XML rappresentante il nodo
-        """
-        node_id = node.get('id')
-        if node_id not in self.nodes:
-            return
+            record: Record del nodo MAU
             
-        self._add_arcs(node, node_id)
-        self._add_probabilities(node, node_id)
+        Returns:
+            Optional[Dict[str, float]]: I pesi per nodo utilità, o None se il
+            nodo non li definisce
+        """
+        if record.parents is None or record.weights is None:
+            return None
+        parents = _split_tokens(record.parents)
+        weights = _parse_floats(record.weights)
+        return dict(zip(parents, weights.tolist()))
     
-    def _add_arcs(self, node: ET.Element, node_id: str) -> None:
+    @staticmethod
+    def _add_arcs(network: 'gum.InfluenceDiagram', nodes: Dict[str, int],
+                  record: _NodeRecord) -> None:
         """
         Aggiunge gli archi al nodo.
         
         Args:
-            node: Elemento XML rappresentante il nodo
-            node_id: ID del nodo
+            network: Il diagramma in costruzione
+            nodes: Dizionario dei nodi creati
+            record: Record del nodo letto dal file XDSL
         """
-        parents_elem = node.find('parents')
-        if parents_elem is not None and parents_elem.text:
-            parent_nodes = parents_elem.text.split()
-            for parent in parent_nodes:
-                if parent in self.nodes:
-                    self.network.addArc(self.nodes[parent], self.nodes[node_id])
+        if record.parents:
+            add_arc = network.addArc
+            child = nodes[record.node_id]
+            for parent in _split_tokens(record.parents):
+                handle = nodes.get(parent)
+                if handle is not None:
+                    add_arc(handle, child)
     
-    def _add_probabilities(self, node: ET.Element, node_id: str) -> None:
+    @staticmethod
+    def _add_probabilities(network: 'gum.InfluenceDiagram', nodes: Dict[str, int],
+                           weights: Dict[str, float], record: _NodeRecord) -> None:
         """
         Aggiunge probabilità o utilità al nodo.
         
         Args:
-            node: Elemento XML rappresentante il nodo
-            node_id: ID del nodo
+            network: Il diagramma in costruzione
+            nodes: Dizionario dei nodi creati
+            weights: Pesi MAU dei nodi utilità
+            record: Record del nodo letto dal file XDSL
         """
-        if node.tag == 'cpt':
-            probs_elem = node.find('probabilities')
-            if probs_elem is not None and probs_elem.text:
-                prob_values = [float(p) for p in probs_elem.text.split()]
-                self.network.cpt(self.nodes[node_id]).fillWith(prob_values)
-        elif node.tag == 'utility':
-            utils_elem = node.find('utilities')
-            if utils_elem is not None and utils_elem.text:
-                util_values = [
-                    float(u) * self.weights.get(node_id, 1) 
-                    for u in utils_elem.text.split()
-                ]
-                self.network.utility(self.nodes[node_id]).fillWith(util_values)
+        node_id = record.node_id
+        if record.tag == 'cpt':
+            if record.probabilities:
+                prob_values = _parse_floats(record.probabilities)
+                network.cpt(nodes[node_id]).fillWith(prob_values.tolist())
+        elif record.tag == 'utility':
+            if record.utilities:
+                weight = weights.get(node_id, 1.0)
+                util_values = _parse_floats(record.utilities) * weight
+                network.utility(nodes[node_id]).fillWith(util_values.tolist())
     
     def generate_pyagrum_code(self) -> str:
         """